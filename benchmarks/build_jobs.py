@@ -0,0 +1,80 @@
+"""
+Compare build() with and without worker processes on a generated document.
+
+    PYTHONPATH=src python benchmarks/build_jobs.py --items 101000 --jobs 4
+
+Besides wall time, the CPU time spent in the parent and in the workers is reported,
+as the parent's share limits the speedup on hosts with many cores.
+"""
+import argparse
+import re
+import resource
+import tempfile
+import time
+from pathlib import Path
+import xml.etree.ElementTree as ET
+
+from asciidoc_to_reqif.generate_reqif import build
+from asciidoc_to_reqif.model import Document, Heading, InfoItem, Requirement
+
+
+DATE_PATTERN = re.compile(rb'(<CREATION-TIME>|LAST-CHANGE=")[^<"]*')
+
+
+def make_text(content: str, paragraphs: int) -> list[ET.Element]:
+    text = []
+    for i in range(paragraphs):
+        paragraph = ET.Element("{http://www.w3.org/1999/xhtml}p")
+        paragraph.text = f"{content}, paragraph {i}: the system shall do something useful."
+        text.append(paragraph)
+    return text
+
+
+def make_document(items: int, paragraphs: int) -> Document:
+    # per heading: 1 heading, 50 requirements with one note each
+    document = Document(ref_id="doc", name="doc")
+    for h in range(max(1, items // 101)):
+        heading = Heading(ref_id=f"heading_{h}", title=f"Heading {h}")
+        for r in range(50):
+            requirement = Requirement(ref_id=f"req_{h}_{r}", title=f"Requirement {h}.{r}",
+                                      text=make_text(f"requirement {h}.{r}", paragraphs), keyword="shall",
+                                      category="technical", role=f"role_{r % 4}")
+            requirement.notes.append(InfoItem(ref_id=f"note_{h}_{r}", title="", text=make_text("note", 1),
+                                              is_note=True))
+            heading.children.append(requirement)
+        document.children.append(heading)
+    return document
+
+
+def children_cpu() -> float:
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def measure(document: Document, out_file: Path, jobs: int) -> tuple[float, float, float]:
+    wall, parent, workers = time.perf_counter(), time.process_time(), children_cpu()
+    build(None, out_file, document, document_title="doc", commit_hash="deadbeef", jobs=jobs)
+    return time.perf_counter() - wall, time.process_time() - parent, children_cpu() - workers
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=101000)
+    parser.add_argument("--paragraphs", type=int, default=5, help="XHTML paragraphs per requirement")
+    parser.add_argument("--jobs", type=int, default=4)
+    args = parser.parse_args()
+
+    document = make_document(args.items, args.paragraphs)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        outputs = []
+        for jobs in (1, args.jobs):
+            out_file = Path(tmp_dir) / f"jobs_{jobs}.reqif"
+            wall, parent, workers = measure(document, out_file, jobs)
+            print(f"jobs={jobs}: wall {wall:.2f}s, parent cpu {parent:.2f}s, worker cpu {workers:.2f}s")
+            # the runs may start in different seconds
+            outputs.append(DATE_PATTERN.sub(rb"\1", out_file.read_bytes()))
+    print("identical output:", outputs[0] == outputs[1])
+
+
+if __name__ == "__main__":
+    main()
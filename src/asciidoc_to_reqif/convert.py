@@ -8,6 +8,16 @@ from .parse_custom_xml import parse_adoc
 from .generate_reqif import build, package
 
 
+def jobs_type(value: str) -> int:
+    try:
+        jobs = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+    if jobs < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1: {jobs}")
+    return jobs
+
+
 def parse_args():
     parser = argparse.ArgumentParser()
     parser.add_argument("input", type=Path, help="input")
@@ -19,6 +29,8 @@ def parse_args():
     parser.add_argument("--json", type=Path, default=None, help="path to load JSON to verify requirement parsing")
     parser.add_argument("--no-plantuml", action="store_true",
                         help="Do not generate PlantUML diagrams (to avoid installing dependencies)")
+    parser.add_argument("-j", "--jobs", type=jobs_type, default=1,
+                        help="number of processes used to generate the ReqIF objects and documents")
     parser.add_argument("-v", "--verbose", action="count", default=0, help="verbose")
     args = parser.parse_args()
     logging.basicConfig(level={0: logging.WARN, 1: logging.INFO, 2: logging.DEBUG}[args.verbose])
@@ -38,8 +50,10 @@ def main():
         document, attachments = parse_adoc(filename=args.input, json_file=args.json, tmp_dir=tmp_dir, enable_plantuml=not args.no_plantuml)
 
         req_if = tmp_dir / args.input.with_suffix(".reqif").name
-        build(args.base, req_if, document, document_title=document_name, commit_hash="deadbeef")  # TODO: parse revision
+        build(args.base, req_if, document, document_title=document_name, jobs=args.jobs,
+              commit_hash="deadbeef")  # TODO: parse revision
         package(req_if, args.output, other_files=attachments)
 
 
-main()
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,11 @@
 import datetime
+import dataclasses
+import io
+import multiprocessing
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import xml.etree.ElementTree as ET
 import logging
@@ -74,6 +81,146 @@ def make_wi(objects: ET.Element, wi: WorkItem, date):
         text_def_ref = ET.SubElement(text_def, "ATTRIBUTE-DEFINITION-STRING-REF")
         text_def_ref.text = "heading_title"
 
+FRAGMENT_TAG = "ASCIIDOC-TO-REQIF-FRAGMENT"
+FRAGMENT_PATTERN = re.compile(rb"<%s-(\d+)(?: />|>.*?</%s-\1>)" % (FRAGMENT_TAG.encode(), FRAGMENT_TAG.encode()),
+                              re.DOTALL)
+
+# only set in forked workers, so they can slice the items instead of receiving them pickled
+_forked_items: dict[str, list[WorkItem]] = {}
+
+
+def init_forked_worker(sources: dict[str, list[WorkItem]]):
+    global _forked_items
+    _forked_items = sources
+
+
+def detach_wi(wi: WorkItem) -> WorkItem:
+    # make_wi only reads the item itself, its children and notes are part of other chunks
+    if isinstance(wi, Heading):
+        return dataclasses.replace(wi, children=[])
+    if isinstance(wi, Requirement):
+        return dataclasses.replace(wi, notes=[])
+    return wi
+
+
+def strip_text(wi: WorkItem) -> WorkItem:
+    # the hierarchy only references the objects, so their text is not needed
+    if isinstance(wi, Heading):
+        return dataclasses.replace(wi, children=[strip_text(child) for child in wi.children])
+    if isinstance(wi, Requirement):
+        return dataclasses.replace(wi, text=[], notes=[strip_text(note) for note in wi.notes])
+    if isinstance(wi, ContentWorkItem):
+        return dataclasses.replace(wi, text=[])
+    return wi
+
+
+def make_wis(parent: ET.Element, wis: list[WorkItem], date):
+    for wi in wis:
+        make_wi(parent, wi, date)
+
+
+def instantiate_wis(parent: ET.Element, wis: list[WorkItem], document_name: str, date, filter_role: str | None,
+                    show_freetext: bool):
+    for wi in wis:
+        instantiate_wi(parent, document_name, wi, date, filter_role=filter_role, show_freetext=show_freetext)
+
+
+def used_namespaces(element: ET.Element) -> set[str]:
+    uris = set()
+    for e in element.iter():
+        for name in (e.tag, *e.attrib):
+            if isinstance(name, str) and name.startswith("{"):
+                uris.add(name[1:name.index("}")])
+    return uris
+
+
+def make_fragment(function, wis: tuple[str, slice] | list[WorkItem], *args) -> tuple[bytes | None, list[str]]:
+    if isinstance(wis, tuple):
+        name, chunk = wis
+        wis = _forked_items[name][chunk]
+    container = ET.Element(FRAGMENT_TAG)
+    function(container, wis, *args)
+    if not len(container):
+        return b"", []
+    # namespaces without a registered prefix get generated prefixes that depend on the rest of the document,
+    # so such fragments are left to the parent
+    uris = used_namespaces(container)
+    if not uris <= set(ns.values()):
+        return None, []
+    xml = ET.tostring(container, encoding="unicode")
+    # strip the container, including the namespace declarations on it
+    xml = xml[xml.index(">") + 1:-len(f"</{FRAGMENT_TAG}>")]
+    return xml.encode("utf-8"), sorted(uris)
+
+
+def add_fragment(parent: ET.Element, fragments: list[bytes], fragment: bytes | None, uris: list[str]) -> bool:
+    if fragment is None:
+        return False
+    # no placeholder for empty fragments, so empty parents stay self-closing as in a serial run
+    if fragment:
+        placeholder = ET.SubElement(parent, f"{FRAGMENT_TAG}-{len(fragments)}")
+        # keeps the namespace declarations on the root identical to a serial run
+        for uri in uris:
+            ET.SubElement(placeholder, f"{{{uri}}}{FRAGMENT_TAG}")
+        fragments.append(fragment)
+    return True
+
+
+def chunk_slices(count: int, jobs: int) -> list[slice]:
+    # several chunks per worker to even out chunks with large XHTML content or deep hierarchies
+    size = max(1, -(-count // (jobs * 4)))
+    return [slice(i, min(i + size, count)) for i in range(0, count, size)]
+
+
+def make_parallel(objects: ET.Element, documents: ET.Element, document: Document, flat_items: list[WorkItem],
+                  views: list[tuple[str, str, str | None, bool]], date: str, jobs: int) -> list[bytes]:
+    # objects and documents only receive placeholders for the returned fragments, see write_reqif
+    jobs = min(jobs, os.cpu_count() or 1)
+    if sys.platform == "win32":
+        jobs = min(jobs, 61)  # limit of ProcessPoolExecutor on Windows
+    sources = {"objects": flat_items, "children": document.children}
+    tasks = [(objects, make_wis, "objects", chunk, (date,)) for chunk in chunk_slices(len(flat_items), jobs)]
+    for identifier, long_name, filter_role, show_freetext in views:
+        document_name, children = add_specification(documents, identifier, long_name, date)
+        tasks.extend((children, instantiate_wis, "children", chunk, (document_name, date, filter_role, show_freetext))
+                     for chunk in chunk_slices(len(document.children), jobs))
+
+    # forking avoids pickling the items, each pool's workers inherit its sources and only receive slices
+    if sys.platform == "linux":
+        context = multiprocessing.get_context("fork")
+        initializer, initargs = init_forked_worker, (sources,)
+        payloads = [(name, chunk) for _, _, name, chunk, _ in tasks]
+    else:
+        # the default on macOS and Windows
+        context = multiprocessing.get_context("spawn")
+        initializer, initargs = None, ()
+        prepare = {"objects": detach_wi, "children": strip_text}
+        payloads = [[prepare[name](wi) for wi in sources[name][chunk]] for _, _, name, chunk, _ in tasks]
+    logger.info("making %d WIs and %d documents in %d chunks using %d processes",
+                len(flat_items), len(views), len(tasks), jobs)
+
+    fragments: list[bytes] = []
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=context, initializer=initializer,
+                             initargs=initargs) as executor:
+        futures = [executor.submit(make_fragment, function, payload, *args)
+                   for (_, function, _, _, args), payload in zip(tasks, payloads)]
+        # results are added in submission order, so the output keeps document order
+        for (parent, function, name, chunk, args), future in zip(tasks, futures):
+            if not add_fragment(parent, fragments, *future.result()):
+                function(parent, sources[name][chunk], *args)
+    return fragments
+
+
+def write_reqif(root: ET.ElementTree, out_file: Path, fragments: list[bytes]):
+    if not fragments:
+        root.write(out_file, xml_declaration=True, method="xml", encoding="UTF-8")
+        return
+    buffer = io.BytesIO()
+    root.write(buffer, xml_declaration=True, method="xml", encoding="UTF-8")
+    with open(out_file, "wb") as f:
+        f.write(FRAGMENT_PATTERN.sub(lambda match: fragments[int(match[1])], buffer.getvalue()))
+
+
 def instantiate_wi(parent: ET.Element, document_name: str, wi: WorkItem, date, filter_role: str | None, show_freetext: bool):
     if isinstance(wi, Heading):
         instantiate_heading(parent=parent, document_name=document_name, heading=wi, date=date, filter_role=filter_role, show_freetext=show_freetext)
@@ -156,7 +303,8 @@ def add_enum(datatypes: ET.Element, name:str, values: list[str], date):
         properties = ET.SubElement(enum_element, "PROPERTIES")
         ET.SubElement(properties, "EMBEDDED-VALUE", attrib={"KEY": str(i), "OTHER-CONTENT": ""})
 
-def build(base_file: Path | None, out_file: Path, document: Document, document_title: str, commit_hash: str):
+def build(base_file: Path | None, out_file: Path, document: Document, document_title: str, commit_hash: str,
+          jobs: int = 1):
     logger.debug(document)
     if base_file is None:
         base_file = Path(__file__).parent / "base.xml"
@@ -177,8 +325,6 @@ def build(base_file: Path | None, out_file: Path, document: Document, document_t
     header.attrib["IDENTIFIER"] = f"ASCIIDOC_EXPORT_{commit_hash}"
 
     flat_items = list(i for child in document.children for i in get_all_items(child))
-    for wi in flat_items:
-        make_wi(objects, wi, date)
     known_roles = set((wi.role for wi in flat_items if isinstance(wi, Requirement)))
 
     # roles enum
@@ -186,14 +332,21 @@ def build(base_file: Path | None, out_file: Path, document: Document, document_t
     assert datatypes is not None
     add_enum(datatypes, "enum_role", list(known_roles), date)
 
-
-    make_document(documents, document, f"{document.name}_full", f"{document.name} - full", date, None, True)
-    make_document(documents, document, f"{document.name}", f"{document.name} - requirements", date, None, False)
+    views = [(f"{document.name}_full", f"{document.name} - full", None, True),
+             (f"{document.name}", f"{document.name} - requirements", None, False)]
     for role in known_roles:
-        make_document(documents, document, f"{document.name}_{role}", f"{document.name} - {role} requirements", date, role, False)
-    root.write(out_file, xml_declaration=True, method="xml", encoding="UTF-8")
+        views.append((f"{document.name}_{role}", f"{document.name} - {role} requirements", role, False))
 
-def make_document(documents_element: ET.Element, document: Document, identifier: str, long_name: str, date: str, filter_role: str|None, show_freetext: bool):
+    if jobs > 1:
+        fragments = make_parallel(objects, documents, document, flat_items, views, date, jobs)
+    else:
+        fragments = []
+        make_wis(objects, flat_items, date)
+        for identifier, long_name, filter_role, show_freetext in views:
+            make_document(documents, document, identifier, long_name, date, filter_role, show_freetext)
+    write_reqif(root, out_file, fragments)
+
+def add_specification(documents_element: ET.Element, identifier: str, long_name: str, date: str) -> tuple[str, ET.Element]:
     document_name = f"{identifier}_full"
     req_document = ET.SubElement(documents_element, "SPECIFICATION",
                                  attrib={"IDENTIFIER": document_name, "LAST-CHANGE": date,
@@ -202,8 +355,12 @@ def make_document(documents_element: ET.Element, document: Document, identifier:
     document_type_ref = ET.SubElement(document_type, "SPECIFICATION-TYPE-REF")
     document_type_ref.text = "requirementdoc"
     children = ET.SubElement(req_document, "CHILDREN")
-    for wi in document.children:
-        instantiate_wi(children, document_name, wi, date, filter_role=filter_role, show_freetext=show_freetext)
+    return document_name, children
+
+
+def make_document(documents_element: ET.Element, document: Document, identifier: str, long_name: str, date: str, filter_role: str|None, show_freetext: bool):
+    document_name, children = add_specification(documents_element, identifier, long_name, date)
+    instantiate_wis(children, document.children, document_name, date, filter_role, show_freetext)
 
 
 def package(reqif_file: Path, out_file: Path, other_files: dict[str, Path]):
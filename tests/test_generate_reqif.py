@@ -0,0 +1,81 @@
+import datetime
+from pathlib import Path
+import types
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from asciidoc_to_reqif import generate_reqif
+from asciidoc_to_reqif.generate_reqif import build
+from asciidoc_to_reqif.model import Document, Heading, InfoItem, Requirement
+
+
+class FixedDatetime(datetime.datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2024, 1, 1)
+
+
+def make_text(content: str, namespace: str = "http://www.w3.org/1999/xhtml") -> list[ET.Element]:
+    paragraph = ET.Element(f"{{{namespace}}}p")
+    paragraph.text = content
+    return [paragraph]
+
+
+def make_document(text_namespace: str = "http://www.w3.org/1999/xhtml") -> Document:
+    document = Document(ref_id="doc", name="doc")
+    document.children.append(InfoItem(ref_id="preface", title="", text=make_text("preface")))
+    for h in range(5):
+        heading = Heading(ref_id=f"heading_{h}", title=f"Heading {h}")
+        for r in range(7):
+            requirement = Requirement(ref_id=f"req_{h}_{r}", title=f"Requirement {h}.{r}",
+                                      text=make_text(f"requirement {h}.{r} <ä>"), keyword="shall",
+                                      category="technical", role=f"role_{r % 3}")
+            requirement.notes.append(InfoItem(ref_id=f"note_{h}_{r}", title="", text=make_text("note"),
+                                              is_note=True))
+            heading.children.append(requirement)
+        heading.children.append(InfoItem(ref_id=f"info_{h}", title="", text=make_text(f"info {h}", text_namespace)))
+        document.children.append(heading)
+    return document
+
+
+def build_bytes(tmp_path: Path, document: Document, jobs: int) -> bytes:
+    out_file = tmp_path / f"jobs_{jobs}.reqif"
+    build(None, out_file, document, document_title="doc", commit_hash="deadbeef", jobs=jobs)
+    return out_file.read_bytes()
+
+
+@pytest.fixture(autouse=True)
+def fixed_date(monkeypatch):
+    monkeypatch.setattr(datetime, "datetime", FixedDatetime)
+
+
+@pytest.mark.parametrize("jobs", [2, 3])
+def test_parallel_build_matches_serial(tmp_path: Path, jobs: int):
+    document = make_document()
+    assert build_bytes(tmp_path, document, jobs) == build_bytes(tmp_path, document, 1)
+
+
+# outside of Linux the items are pickled to spawned workers
+def test_parallel_build_matches_serial_spawn(tmp_path: Path, monkeypatch):
+    document = make_document()
+    serial = build_bytes(tmp_path, document, 1)
+    monkeypatch.setattr(generate_reqif, "sys", types.SimpleNamespace(platform="darwin"))
+    assert build_bytes(tmp_path, document, 2) == serial
+
+
+# chunks with namespaces without a registered prefix are made by the parent
+def test_parallel_build_matches_serial_unregistered_namespace(tmp_path: Path):
+    document = make_document(text_namespace="urn:example")
+    serial = build_bytes(tmp_path, document, 1)
+    assert b"urn:example" in serial
+    assert build_bytes(tmp_path, document, 2) == serial
+
+
+# the requirements document has no children, its CHILDREN must stay empty
+def test_parallel_build_matches_serial_without_requirements(tmp_path: Path):
+    document = Document(ref_id="doc", name="doc")
+    document.children = [InfoItem(ref_id=f"info_{i}", title="", text=make_text(f"info {i}")) for i in range(5)]
+    serial = build_bytes(tmp_path, document, 1)
+    assert b"<CHILDREN />" in serial
+    assert build_bytes(tmp_path, document, 2) == serial